@@ -53,14 +53,10 @@ def preprocess_batch(batch, args):
 def load_datasets(args, val_proportion=0.1, test_proportion=0.1):
     conf_file = f"qmugs{'_no_h' if args.remove_h else ''}_heavy_lt_{'{}'.format(args.max_heavy_atoms)}.npy"
     conf_path = os.path.join(args.data_dir, conf_file)
-    data_file = 'summary_heavy_lt_{}.csv'.format(args.max_heavy_atoms)
-    data_path = os.path.join(args.data_dir, data_file)
 
     ### Load data
-    data = pd.read_csv(data_path)
-    prop_data = {}
-    for prop in args.properties:
-        prop_data[prop] = data[prop].to_numpy()
+    data = pd.read_csv(get_summary_path(args))
+    prop_data = load_props(args, data=data)
     smiles = data.drop_duplicates(subset='smiles').smiles.to_list()
     selfies = [sf.encoder(smi) for smi in smiles]
     confs = np.load(conf_path)
@@ -113,6 +109,18 @@ def load_datasets(args, val_proportion=0.1, test_proportion=0.1):
         val_conf_data += np.split(mol, conf_split_indices)
     return train_conf_data, val_conf_data, test_conf_data, string_data, prop_data, args
 
+def get_summary_path(args):
+    data_file = 'summary_heavy_lt_{}.csv'.format(args.max_heavy_atoms)
+    return os.path.join(args.data_dir, data_file)
+
+def load_props(args, data=None):
+    if data is None:
+        data = pd.read_csv(get_summary_path(args), usecols=args.properties)
+    prop_data = {}
+    for prop in args.properties:
+        prop_data[prop] = data[prop].to_numpy()
+    return prop_data
+
 class QMugsDataLoader(DataLoader):
     def __init__(self, dataset, batch_size, shuffle=False, drop_last=False, sampler=None):
         super().__init__(dataset, batch_size, shuffle=shuffle, collate_fn=collate_fn,
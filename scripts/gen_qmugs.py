@@ -1,9 +1,15 @@
 import os
 import sys
 sys.path.append(os.getcwd())
+import csv
+import glob
 import argparse
+import hashlib
+import itertools
+import json
+from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import pandas as pd
 from tqdm import tqdm
 from configs.datasets_config import get_dataset_info
 
@@ -14,7 +20,7 @@ from qmugs.utils import prop_key, compute_mean_mad, preprocess_batch
 
 from vagrant.model import Vagrant
 from vagrant.conformers import smiles_to_coords
-from vagrant.utils import calc_entropy, preprocess_batch_from_inputs, calc_coherence
+from vagrant.utils import calc_entropy, quantize_latents, preprocess_batch_from_inputs, calc_coherence
 
 def init_model(args, ckpt):
     model = Vagrant(args, predict_property=args.predict_property, ckpt_file=ckpt)
@@ -26,8 +32,108 @@ def init_model(args, ckpt):
     model.args.means = args.means
     model.args.device = args.device
     model.args.dtype = args.dtype
+    if args.compile and args.cuda:
+        # decode is re-run on a fixed (batch_size, max_length+1) input at every step of
+        # autoregressive sampling, so CUDA graphs remove most of its launch overhead
+        model.decode = torch.compile(model.decode, mode='reduce-overhead', dynamic=False)
     return model
 
+def prefetch_batch_from_inputs(pos, charge, one_hot, one_hot_edges, args, copy_stream=None):
+    """
+    Preprocesses one batch of reconstructed inputs. On GPU the host tensors are
+    pinned and copied on copy_stream so they overlap with encoding
+    """
+    batch_inputs = [pos, one_hot, charge, one_hot_edges]
+    if copy_stream is None:
+        return preprocess_batch_from_inputs(*batch_inputs, args), None
+    batch_inputs = [x.pin_memory() for x in batch_inputs]
+    with torch.cuda.stream(copy_stream):
+        inputs = preprocess_batch_from_inputs(*batch_inputs, args, non_blocking=True)
+        return inputs, copy_stream.record_event()
+
+def encode_batch(model, inputs, copied=None, compute_stream=None):
+    if compute_stream is None:
+        mu, _ = model.encode(*inputs)
+        return mu.detach().cpu()
+    compute_stream.wait_event(copied)
+    for x in inputs:
+        for t in (x if isinstance(x, list) else [x]):
+            if torch.is_tensor(t):
+                t.record_stream(compute_stream)
+    with torch.cuda.stream(compute_stream):
+        mu, _ = model.encode(*inputs)
+        return mu.detach().to('cpu', non_blocking=True)
+
+def init_conformer_worker(included_species, bond_types, dataset_info):
+    """
+    Stores the conformer lookup tables as globals of each Pool worker so they are
+    inherited once instead of pickled with every chunk
+    """
+    global _included_species, _bond_types, _dataset_info
+    _included_species = included_species
+    _bond_types = bond_types
+    _dataset_info = dataset_info
+
+def chunk_to_coords(smiles):
+    return smiles_to_coords(smiles, _included_species, _bond_types, _dataset_info, verbose=False)
+
+def load_mean_mad(args, raw_props=None):
+    """
+    Property means and MADs, cached per property in checkpoints/<name>/mean_mad.json.
+    The property columns are only read from disk when raw_props is not given and
+    some property is missing from the cache
+    """
+    cache_file = 'checkpoints/{}/mean_mad.json'.format(args.name)
+    cached = {}
+    if os.path.exists(cache_file):
+        with open(cache_file) as f:
+            cached = json.load(f)
+    missing = [prop for prop in args.properties if prop not in cached]
+    if len(missing) > 0:
+        if raw_props is None:
+            raw_props = qmugs_utils.load_props(args)
+        means, mads = compute_mean_mad({prop: raw_props[prop] for prop in missing})
+        for prop in missing:
+            cached[prop] = [means[prop].item(), mads[prop].item()]
+        with open(cache_file + '.tmp', 'w') as f:
+            json.dump(cached, f)
+        os.replace(cache_file + '.tmp', cache_file)
+    means = {prop: torch.tensor(cached[prop][0], dtype=torch.float64) for prop in args.properties}
+    mads = {prop: torch.tensor(cached[prop][1], dtype=torch.float64) for prop in args.properties}
+    return means, mads
+
+def save_array(path, arr):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, arr, allow_pickle=False)
+    os.replace(tmp_path, path)
+
+def remove_stale_caches(pattern, keep):
+    for fn in glob.glob(pattern):
+        if fn not in keep:
+            os.remove(fn)
+
+def calc_train_mems(model, raw_train, raw_string, raw_props, dataset_info, args, n_train_batches=1000):
+    transform = qmugs_utils.QMugsTransform(dataset_info, args.device)
+    dataset = qmugs_utils.QMugsDataset(raw_train, raw_string, raw_props, transform=transform)
+    train_loader = qmugs_utils.QMugsDataLoader(dataset, batch_size=args.batch_size, shuffle=False)
+
+    train_mems = np.empty((n_train_batches * args.batch_size, 128), dtype=np.float32)
+    n = 0
+    with torch.inference_mode():
+        for data in tqdm(itertools.islice(train_loader, n_train_batches), total=n_train_batches):
+            nodes, atom_positions, edges, edge_attr, atom_mask,\
+            edge_mask, n_nodes, y_true, y0, y_mask, props, scaled_props = preprocess_batch(data, args)
+            # bf16 puts |mu| in [2, 4) on a 1/64 grid, coarser than the 0.01 entropy bins, so
+            # entropies of wide dimensions come out slightly low near the 5 nat threshold
+            with torch.autocast(device_type='cuda', dtype=torch.bfloat16,
+                                enabled=args.cuda and torch.cuda.is_bf16_supported()):
+                mu, _ = model.encode(nodes, atom_positions, edges, edge_attr, atom_mask, edge_mask, n_nodes)
+            mu_np = mu.detach().float().cpu().numpy()
+            train_mems[n:n+mu_np.shape[0]] = mu_np
+            n += mu_np.shape[0]
+    return train_mems[:n]
+
 def gen(args):
     # Set up device and dtype
     args.cuda = torch.cuda.is_available()
@@ -40,95 +146,119 @@ def gen(args):
     os.makedirs(os.path.join(args.sample_dir, gen_name), exist_ok=True)
     gen_path = os.path.join(args.sample_dir, gen_name, '{}_gen.csv'.format(args.name))
 
+    # Set up checkpoint and latent caches. Caches are named by epoch plus a hash of the
+    # checkpoint file, so only a rewritten checkpoint of the same epoch makes them stale
+    ckpt = 'checkpoints/{}/{}_{}.ckpt'.format(args.name, args.ckpt_epoch, args.name)
+    cache_key = '{}_{}'.format(args.ckpt_epoch, hashlib.md5('{}_{}_{}'.format(args.name, args.ckpt_epoch,
+                               os.path.getmtime(ckpt)).encode()).hexdigest()[:8])
+    entropy_path = 'checkpoints/{}/train_entropy_{}.npy'.format(args.name, cache_key)
+    mems_path = 'checkpoints/{}/train_mems_{}.npy'.format(args.name, cache_key)
+    qparams_path = 'checkpoints/{}/train_mems_qparams_{}.npy'.format(args.name, cache_key)
+    if os.path.exists(mems_path) and not os.path.exists(qparams_path):
+        # Quantized train_mems are unusable without their scale and zero point
+        os.remove(mems_path)
+
     # Load data
-    args.properties = [prop_key[prop] for prop in args.properties]
-    if len(args.properties) > 0:
-        args.predict_property = True
-    else:
-        args.predict_property = False
+    args.properties = list(map(prop_key.__getitem__, args.properties))
+    args.predict_property = len(args.properties) > 0
     dataset_info = get_dataset_info('qmugs', remove_h=args.remove_h)
-    raw_train, raw_val, raw_test, raw_string, raw_props, args = qmugs_utils.load_datasets(args)
-    args.means, args.mads = compute_mean_mad(raw_props)
-    included_species = torch.Tensor(dataset_info['atomic_nb'])[None, :].int().view(-1,)
-    bond_types = torch.tensor([1,2,3,4])
+    raw_props = None
+    if not os.path.exists(entropy_path) and not os.path.exists(mems_path):
+        raw_train, raw_val, raw_test, raw_string, raw_props, args = qmugs_utils.load_datasets(args)
+    args.means, args.mads = load_mean_mad(args, raw_props)
+    included_species = torch.as_tensor(dataset_info['atomic_nb'], dtype=torch.int32)
+    bond_types = torch.as_tensor([1,2,3,4], dtype=torch.int32)
 
     # Load model
-    ckpt = 'checkpoints/{}/{}_{}.ckpt'.format(args.name, args.ckpt_epoch, args.name)
     model = init_model(args, ckpt)
     args.charge_power = model.args.charge_power
     args.charge_scale = model.args.charge_scale
-    print(model)
+    if args.verbose:
+        print(model)
 
     # Calculate latent entropy
     try:
-        train_mems = np.load('checkpoints/{}/train_mems.npy'.format(args.name))
+        train_entropy = np.load(entropy_path)
     except FileNotFoundError:
-        print('calculating train mems...')
-        transform = qmugs_utils.QMugsTransform(dataset_info, args.device)
-        dataset = qmugs_utils.QMugsDataset(raw_train, raw_string, raw_props, transform=transform)
-        train_loader = qmugs_utils.QMugsDataLoader(dataset, batch_size=args.batch_size, shuffle=False)
-        train_mems = np.empty((0,128))
-
-        n_train_batches = 1000
-        for i, data in enumerate(tqdm(train_loader, total=n_train_batches)):
-            if i >= n_train_batches:
-                break
-            nodes, atom_positions, edges, edge_attr, atom_mask,\
-            edge_mask, n_nodes, y_true, y0, y_mask, props, scaled_props = preprocess_batch(data, args)
-            mu, _ = model.encode(nodes, atom_positions, edges, edge_attr, atom_mask, edge_mask, n_nodes)
-            train_mems = np.concatenate([train_mems, mu.detach().cpu().numpy()])
-        np.save('checkpoints/{}/train_mems.npy'.format(args.name), train_mems)
-    train_entropy = calc_entropy(train_mems)
-    high_entropy_dims = np.where(train_entropy >= 5.)[0]
-    low_entropy_dims = np.where(train_entropy < 5.)[0]
+        try:
+            train_mems = np.load(mems_path, mmap_mode='r')
+            train_qparams = np.load(qparams_path)
+        except FileNotFoundError:
+            print('calculating train mems...')
+            train_mems = calc_train_mems(model, raw_train, raw_string, raw_props, dataset_info, args)
+            train_mems, train_qparams = quantize_latents(train_mems)
+            # qparams go first and each file is moved into place only once fully written,
+            # so a train_mems file on disk always has its qparams next to it
+            save_array(qparams_path, train_qparams)
+            save_array(mems_path, train_mems)
+            remove_stale_caches('checkpoints/{}/train_mems_{}_*.npy'.format(args.name, args.ckpt_epoch),
+                                keep=(mems_path,))
+            remove_stale_caches('checkpoints/{}/train_mems_qparams_{}_*.npy'.format(args.name, args.ckpt_epoch),
+                                keep=(qparams_path,))
+        train_entropy = calc_entropy(train_mems, train_qparams)
+        save_array(entropy_path, train_entropy)
+        remove_stale_caches('checkpoints/{}/train_entropy_{}_*.npy'.format(args.name, args.ckpt_epoch),
+                            keep=(entropy_path,))
+    high_entropy_mask = train_entropy >= 5.
+    high_entropy_dims = np.flatnonzero(high_entropy_mask)
+    low_entropy_dims = np.flatnonzero(~high_entropy_mask)
     print('calculated latent entropy...')
 
     # Generate samples
+    # Sampling never needs gradients, and a compiled decode() must not trace a backward graph
     print('generating {} samples...'.format(args.n_samples))
-    if args.sample_method == 'direct':
-        gen, pred_props, sampled_z = model.sample_direct(args.n_samples)
-    elif args.sample_method == 'robust':
-        gen, pred_props, sampled_z = model.sample_robust(args.n_samples, args.n_perturbations, args.radius,
-                                                         high_entropy_dims, low_entropy_dims)
+    with torch.inference_mode():
+        if args.sample_method == 'direct':
+            gen, pred_props, sampled_z = model.sample_direct(args.n_samples)
+        elif args.sample_method == 'robust':
+            gen, pred_props, sampled_z = model.sample_robust(args.n_samples, args.n_perturbations, args.radius,
+                                                             high_entropy_dims, low_entropy_dims)
 
     # Calculate incoherence
     if args.calc_coherence:
-        # Reconstruct 3D molecular structures from SMILES
-        pos, charge, one_hot, one_hot_edges, smiles, regen_idxs = smiles_to_coords(gen, included_species,
-                                                                                   bond_types, dataset_info)
-
-        # Pass reconstructed 3D molecules through encoder
-        z_prime = torch.empty(0,128)
-        for i in range(0, pos.shape[0], args.batch_size):
-            batch_positions = pos[i:i+args.batch_size]
-            batch_charges = charge[i:i+args.batch_size]
-            batch_one_hot = one_hot[i:i+args.batch_size]
-            batch_one_hot_edges = one_hot_edges[i:i+args.batch_size]
-            nodes, atom_positions, edges, edge_attr,\
-            atom_mask, edge_mask, n_nodes = preprocess_batch_from_inputs(batch_positions, batch_one_hot,
-                                                                         batch_charges, batch_one_hot_edges,
-                                                                         args)
-            mu, _ = model.encode(nodes, atom_positions, edges, edge_attr, atom_mask, edge_mask, n_nodes)
-            z_prime = torch.cat([z_prime, mu.detach().cpu()])
+        # Reconstruct 3D molecular structures from SMILES in worker processes and
+        # pass each chunk through the encoder as soon as it is ready
+        smiles_chunks = [gen[i:i+args.batch_size] for i in range(0, len(gen), args.batch_size)]
+        copy_stream = torch.cuda.Stream() if args.cuda else None
+        compute_stream = torch.cuda.Stream() if args.cuda else None
+        regen_idxs = []
+        z_chunks = []
+        with Pool(args.n_conformer_workers, initializer=init_conformer_worker,
+                  initargs=(included_species, bond_types, dataset_info)) as pool,\
+             ThreadPoolExecutor(1) as executor, torch.inference_mode():
+            future = None
+            coords_iter = tqdm(pool.imap(chunk_to_coords, smiles_chunks), total=len(smiles_chunks))
+            for j, coords in enumerate(coords_iter):
+                pos, charge, one_hot, one_hot_edges, _, succeeded = coords
+                regen_idxs += [j*args.batch_size + k for k in succeeded]
+                next_future = executor.submit(prefetch_batch_from_inputs, pos, charge, one_hot,
+                                              one_hot_edges, args, copy_stream)
+                if future is not None:
+                    z_chunks.append(encode_batch(model, *future.result(), compute_stream))
+                future = next_future
+            z_chunks.append(encode_batch(model, *future.result(), compute_stream))
+        if args.cuda:
+            torch.cuda.synchronize()
+        z_prime = torch.cat(z_chunks, dim=0)
 
         # Reconstruct molecules from z_prime
-        if args.sample_method == 'direct':
-            regen, _, _ = model.sample_direct(z_prime.shape[0], from_z=True, z=z_prime)
-        elif args.sample_method == 'robust':
-            regen, _, _ = model.sample_robust(z_prime.shape[0], args.n_perturbations, args.radius,
-                                              high_entropy_dims, low_entropy_dims, from_z=True,
-                                              z=z_prime)
+        with torch.inference_mode():
+            if args.sample_method == 'direct':
+                regen, _, _ = model.sample_direct(z_prime.shape[0], from_z=True, z=z_prime)
+            elif args.sample_method == 'robust':
+                regen, _, _ = model.sample_robust(z_prime.shape[0], args.n_perturbations, args.radius,
+                                                  high_entropy_dims, low_entropy_dims, from_z=True,
+                                                  z=z_prime)
         incoherence = calc_coherence(gen, regen, regen_idxs, dist=True)
 
     else:
         incoherence = [None] * args.n_samples
 
     # Write data
-    data = {'smiles': gen,
-            'predicted_property': pred_props[:,0],
-            'incoherence': incoherence}
-    data = pd.DataFrame(data)
-    data.to_csv(gen_path, index=False)
+    with open(gen_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['smiles', 'predicted_property', 'incoherence'])
+        writer.writerows(zip(gen, pred_props[:,0].numpy(), incoherence))
         
 
 if __name__ == '__main__':
@@ -139,6 +269,7 @@ if __name__ == '__main__':
     parser.add_argument('--ckpt_epoch', default='1000', type=str)
     parser.add_argument('--sample_dir', default='samples', type=str)
     parser.add_argument('--distributed', default=False, action='store_true')
+    parser.add_argument('--verbose', default=False, action='store_true')
 
     ### Sample Parameters
     parser.add_argument('--n_samples', default=10000, type=int)
@@ -149,6 +280,10 @@ if __name__ == '__main__':
     parser.add_argument('--temp', default=0.5, type=float)
     parser.add_argument('--n_perturbations', default=100, type=int)
     parser.add_argument('--radius', default=0.1, type=float)
+    parser.add_argument('--compile', default=False, action='store_true',
+                        help='compile the decoder with CUDA graphs; each distinct batch size '
+                             '(a smaller final batch, or n_perturbations for robust sampling) '
+                             'triggers its own recompile')
 
     ### Data Parameters
     parser.add_argument('--data_dir', default='./data/qmugs', type=str)
@@ -159,5 +294,6 @@ if __name__ == '__main__':
     parser.add_argument('--max_heavy_atoms', default=50, type=int)
     parser.add_argument('--properties', nargs='+', default=[])
     parser.add_argument('--calc_coherence', default=False, action='store_true')
+    parser.add_argument('--n_conformer_workers', default=os.cpu_count(), type=int)
     args = parser.parse_args()
     gen(args)
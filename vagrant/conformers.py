@@ -16,10 +16,10 @@ def conformer_to_data(conformer, included_species, with_h):
     one_hot = charges.unsqueeze(-1) == included_species.unsqueeze(0).unsqueeze(0)
     return positions, charges, one_hot
 
-def smiles_to_coords(smiles, included_species, bond_types, dataset_info):
+def smiles_to_coords(smiles, included_species, bond_types, dataset_info, verbose=True):
     mols = {"positions": [], "charges": [], "bonds": [], "smiles": []}
     succeeded = []
-    for i in trange(len(smiles)):
+    for i in trange(len(smiles), disable=not verbose):
         smi = smiles[i]
         ce = ConformerEnsemble.from_rdkit(smi, optimize="MMFF94")
         ce.prune_rmsd()
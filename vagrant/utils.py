@@ -1,7 +1,6 @@
 import re
 import numpy as np
 import selfies as sf
-from scipy.stats import entropy
 from itertools import permutations
 from sklearn.preprocessing import MinMaxScaler
 from qm9.rdkit_functions import build_xae_molecule
@@ -18,12 +17,40 @@ from torch.autograd import Variable
 ################################## METRICS #####################################
 ################################################################################
 
-def calc_entropy(samples):
-    es = []
-    for i in range(samples.shape[1]):
-        probs, bin_edges = np.histogram(samples[:,i], bins=1000, range=(-5., 5.), density=True)
-        es.append(entropy(probs))
-    return np.array(es)
+def quantize_latents(samples, dtype=np.int16):
+    """
+    Per-dimension affine quantization of latent samples. Returns the quantized
+    samples and a (2, d) array holding the scale and zero point of each dimension
+    """
+    info = np.iinfo(dtype)
+    mins = samples.min(axis=0)
+    maxs = samples.max(axis=0)
+    scale = np.maximum(maxs - mins, 1e-8) / (int(info.max) - int(info.min))
+    zero_point = mins - info.min * scale
+    q = np.round((samples - zero_point) / scale).clip(info.min, info.max).astype(dtype)
+    return q, np.stack([scale, zero_point])
+
+def calc_entropy(samples, qparams=None, n_bins=1000, bin_range=(-5., 5.), chunk_size=65536):
+    """
+    Entropy of the binned distribution of each latent dimension. Bin counts for
+    all dimensions are accumulated with a single bincount per chunk of rows
+    """
+    n_dims = samples.shape[1]
+    lo, hi = bin_range
+    offsets = np.arange(n_dims) * n_bins
+    counts = np.zeros(n_dims * n_bins, dtype=np.int64)
+    for start in range(0, samples.shape[0], chunk_size):
+        x = samples[start:start+chunk_size].astype(np.float64)
+        if qparams is not None:
+            x = x * qparams[0] + qparams[1]
+        in_range = (x >= lo) & (x <= hi)
+        bins = np.floor((np.where(in_range, x, lo) - lo) * (n_bins / (hi - lo))).astype(np.int64)
+        bins = bins.clip(0, n_bins - 1) + offsets
+        counts += np.bincount(bins[in_range], minlength=n_dims * n_bins)
+    counts = counts.reshape(n_dims, n_bins)
+    probs = counts / counts.sum(axis=1, keepdims=True)
+    log_probs = np.log(probs, out=np.zeros_like(probs), where=probs > 0)
+    return -np.sum(probs * log_probs, axis=1)
 
 def calc_coherence(gen, regen, regen_idxs, dist=False):
     coherence = []
@@ -374,23 +401,23 @@ def preprocess_batch(batch, args):
     return nodes, atom_positions, edges, edge_attr, atom_mask,\
            edge_mask, n_nodes, y_true, y0, y_mask, props, scaled_props
 
-def preprocess_batch_from_inputs(pos, one_hot, charges, one_hot_edges, args):
+def preprocess_batch_from_inputs(pos, one_hot, charges, one_hot_edges, args, non_blocking=False):
     batch_positions = pos
-    batch_one_hot = one_hot.to(args.device, args.dtype)
-    batch_charges = charges.to(args.device, args.dtype)
+    batch_one_hot = one_hot.to(args.device, args.dtype, non_blocking=non_blocking)
+    batch_charges = charges.to(args.device, args.dtype, non_blocking=non_blocking)
     batch_size, n_nodes, _ = batch_positions.size()
-    atom_positions = batch_positions.view(batch_size * n_nodes, -1).to(args.device, args.dtype)
+    atom_positions = batch_positions.view(batch_size * n_nodes, -1).to(args.device, args.dtype, non_blocking=non_blocking)
     atom_mask = batch_charges > 0
     edge_mask = atom_mask.unsqueeze(1) * atom_mask.unsqueeze(2)
     diag_mask = ~torch.eye(edge_mask.size(1), dtype=torch.bool).unsqueeze(0).to(args.device)
     edge_mask *= diag_mask
-    edge_mask = edge_mask.view(batch_size * n_nodes * n_nodes, 1).to(args.device, args.dtype)
-    atom_mask = atom_mask.view(batch_size * n_nodes, -1).to(args.device, args.dtype)
+    edge_mask = edge_mask.view(batch_size * n_nodes * n_nodes, 1).to(args.device, args.dtype, non_blocking=non_blocking)
+    atom_mask = atom_mask.view(batch_size * n_nodes, -1).to(args.device, args.dtype, non_blocking=non_blocking)
     nodes = preprocess_nodes(batch_one_hot, batch_charges, args.charge_power, args.charge_scale, args.device)
     nodes = nodes.view(batch_size * n_nodes, -1)
     edges = get_adj_matrix(n_nodes, batch_size, args.device)
     if args.include_bonds:
-        edge_attr = one_hot_edges.contiguous().view(batch_size*n_nodes*n_nodes,-1).to(args.device, args.dtype)
+        edge_attr = one_hot_edges.contiguous().view(batch_size*n_nodes*n_nodes,-1).to(args.device, args.dtype, non_blocking=non_blocking)
     else:
         edge_attr = None
     return nodes, atom_positions, edges, edge_attr, atom_mask, edge_mask, n_nodes